@@ -40,17 +40,20 @@ def main(batch, out):
             "explanation": "",
             "citations": [],
             "error": None,
-            "repair_count": 0
+            "repair_count": 0,
+            "prompt_tokens_saved": 0
         }
         
         try:
             final_state = agent.graph.invoke(initial_state)
+            print(f"  Prompt tokens saved: {final_state.get('prompt_tokens_saved', 0)}")
             
             output = {
                 "id": item["id"],
                 "final_answer": final_state.get("final_answer"),
                 "sql": final_state.get("sql_query", ""),
                 "confidence": 0.0, 
+                "prompt_tokens_saved": final_state.get("prompt_tokens_saved", 0),
                 "explanation": final_state.get("explanation", ""),
                 "citations": final_state.get("citations", [])
             }
@@ -74,6 +77,7 @@ def main(batch, out):
                 "final_answer": None,
                 "sql": "",
                 "confidence": 0.0,
+                "prompt_tokens_saved": 0,
                 "explanation": f"Error: {str(e)}",
                 "citations": []
             })
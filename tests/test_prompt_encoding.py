@@ -0,0 +1,135 @@
+import pytest
+
+from your_project.agent import prompt_encoding
+from your_project.agent.prompt_encoding import (
+    MAX_CELL_CHARS,
+    encode_docs,
+    encode_sql_result,
+    estimate_raw_tokens,
+    estimate_tokens,
+)
+
+
+def _result(rows, columns=None):
+    return {"columns": columns if columns is not None else list(rows[0].keys()), "rows": rows, "error": None}
+
+
+def test_empty_and_error_results():
+    assert encode_sql_result({}) == "No SQL result."
+    assert encode_sql_result({"columns": [], "rows": [], "error": "no such table"}) == "Error: no such table"
+    assert encode_sql_result(_result([], columns=["a"])) == "No rows returned."
+
+
+def test_small_result_is_compact_table():
+    rows = [{"product": "Chai", "revenue": 1234.5678}, {"product": "Tofu", "revenue": None}]
+    assert encode_sql_result(_result(rows)) == "product | revenue\nChai | 1234.57\nTofu | "
+
+
+def test_missing_columns_falls_back_to_row_keys():
+    assert encode_sql_result(_result([{"x": 1}], columns=[])) == "x\n1"
+
+
+@pytest.mark.parametrize("value, expected", [
+    (3.0, "3"),
+    (2.999, "3"),
+    (3.7, "3.7"),
+    (0.001, "0.001"),
+    (0.123456, "0.123"),
+    (-0.0004567, "-0.000457"),
+    (float("nan"), ""),
+    (7, "7"),
+])
+def test_number_formatting(value, expected):
+    assert encode_sql_result(_result([{"v": value}])) == f"v\n{expected}"
+
+
+def test_large_result_uses_head_tail_and_summary():
+    rows = [{"name": f"P{i}", "d": 0.001} for i in range(300)]
+    text = encode_sql_result(_result(rows))
+    lines = text.splitlines()
+    assert lines[1] == "P0 | 0.001"
+    assert "... (290 rows omitted) ..." in lines
+    assert lines[-2] == "rows: 300"
+    assert lines[-1] == "d: min=0.001, max=0.001, sum=0.3"
+    assert estimate_tokens(text) <= 400
+
+
+def test_long_single_row_is_kept_and_truncated():
+    text = encode_sql_result(_result([{"x": "a" * 5000}]))
+    assert text == "x\n" + "a" * MAX_CELL_CHARS + "…"
+
+
+@pytest.mark.parametrize("max_tokens", [5, 20, 100, 400])
+def test_output_never_exceeds_budget(max_tokens):
+    wide = [{f"column_{c}": r * 1.2345 + c for c in range(80)} for r in range(3)]
+    long_ = [{"id": i, "note": "x" * 200} for i in range(50)]
+    for result in (_result(wide), _result(long_)):
+        text = encode_sql_result(result, max_tokens=max_tokens)
+        assert estimate_tokens(text) <= max_tokens
+
+
+def test_wide_result_drops_columns_before_rows():
+    wide = [{f"column_{c}": r * 1.2345 + c for c in range(80)} for r in range(3)]
+    text = encode_sql_result(_result(wide), max_tokens=400)
+    header = text.splitlines()[0]
+    assert "more columns)" in header
+    assert "column_79" in header
+    assert text.splitlines()[1].endswith("| 79")
+
+
+def test_trailing_aggregate_survives_column_dropping():
+    rows = [
+        {"OrderID": 10248 + i, "CustomerID": f"CUST{i}", "ProductName": "p" * 50, "qty": i, "revenue": i * 10.5}
+        for i in range(100)
+    ]
+    text = encode_sql_result(_result(rows), max_tokens=60)
+    lines = text.splitlines()
+    assert lines[0] == "qty | revenue | (+3 more columns)"
+    assert lines[-1] == "revenue: min=0, max=1039.5, sum=51975"
+    assert not any(line.startswith("OrderID:") for line in lines)
+    assert estimate_tokens(text) <= 60
+
+
+def test_single_omitted_row_marker_is_singular():
+    rows = [{"note": "x" * 100, "detail": "y" * 100, "v": i} for i in range(3)]
+    text = encode_sql_result(_result(rows), max_tokens=90)
+    assert "... (1 row omitted) ..." in text.splitlines()
+
+
+def test_large_result_formats_only_sampled_rows(monkeypatch):
+    rows = [{"OrderID": i, "UnitPrice": 14.0 + i % 7, "Quantity": i % 40, "Discount": 0.05} for i in range(200000)]
+    calls = []
+    original = prompt_encoding._format_value
+    monkeypatch.setattr(prompt_encoding, "_format_value", lambda *a, **kw: calls.append(1) or original(*a, **kw))
+    text = encode_sql_result(_result(rows))
+    assert "rows: 200000" in text
+    # Early-exit fit check plus the 10 sampled rows, not one call per cell
+    assert len(calls) < 500
+
+
+def test_raw_token_estimate_tracks_repr():
+    rows = [{"product": f"P{i}", "revenue": i * 1.5} for i in range(1000)]
+    result = _result(rows)
+    exact = estimate_tokens(str(result))
+    assert abs(estimate_raw_tokens(result) - exact) / exact < 0.05
+    assert estimate_raw_tokens(_result(rows[:5])) == estimate_tokens(str(_result(rows[:5])))
+    assert estimate_raw_tokens({}) == estimate_tokens("{}")
+
+
+def test_docs_drop_scores_and_low_ranked_chunks():
+    docs = [
+        {"id": "policy::chunk0", "content": "Beverages: 14 days.", "source": "policy", "score": 0.9},
+        {"id": "catalog::chunk1", "content": "y" * 5000, "source": "catalog", "score": 0.1},
+    ]
+    assert encode_docs(docs[:1]) == "[policy::chunk0] Beverages: 14 days."
+    text = encode_docs(docs, max_tokens=12)
+    assert text == "[policy::chunk0] Beverages: 14 days."
+    assert encode_docs([]) == "No documents retrieved."
+
+
+def test_oversized_chunk_is_truncated_to_budget():
+    docs = [{"id": "catalog::chunk0", "content": "y" * 5000, "source": "catalog", "score": 0.5}]
+    text = encode_docs(docs, max_tokens=600)
+    assert text.startswith("[catalog::chunk0] yyy")
+    assert text.endswith("…")
+    assert estimate_tokens(text) <= 600
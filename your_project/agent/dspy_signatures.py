@@ -41,8 +41,8 @@ class SynthesizeAnswer(dspy.Signature):
     Include citations for all used database tables and document chunks.
     """
     question = dspy.InputField(desc="The user's question.")
-    sql_result = dspy.InputField(desc="Result of the executed SQL query (if any).")
-    retrieved_docs = dspy.InputField(desc="Relevant document chunks with IDs.")
+    sql_result = dspy.InputField(desc="Result of the executed SQL query as a 'col | col' header plus rows, with summary stats if truncated.")
+    retrieved_docs = dspy.InputField(desc="Relevant document chunks, each prefixed with its [id].")
     format_hint = dspy.InputField(desc="The required format for the final answer.")
     
     final_answer = dspy.OutputField(desc="The answer matching the format_hint.")
@@ -4,6 +4,7 @@ from langgraph.graph import StateGraph, END
 from your_project.agent.dspy_signatures import Router, Planner, GenerateSQL, SynthesizeAnswer
 from your_project.agent.rag.retrieval import Retriever
 from your_project.agent.tools.sqlite_tool import SQLiteTool
+from your_project.agent.prompt_encoding import encode_sql_result, encode_docs, estimate_tokens, estimate_raw_tokens
 import os
 
 class AgentState(TypedDict):
@@ -19,6 +20,7 @@ class AgentState(TypedDict):
     error: Optional[str]
     repair_count: int
     format_hint: str
+    prompt_tokens_saved: int
 
 class RetailAgent:
     def __init__(self, db_path, docs_dir):
@@ -158,11 +160,18 @@ class RetailAgent:
         # We let the model decide final citations but pass these as context if needed
         # Actually the signature asks for citations as output, so we rely on the model
         
+        # Compact encodings instead of raw Python reprs keep the prompt small
+        sql_result_text = encode_sql_result(state.get("sql_result", {}))
+        docs_text = encode_docs(docs)
+        raw_tokens = estimate_raw_tokens(state.get("sql_result", {})) + estimate_tokens(str(docs))
+        # Clamped at 0: on tiny inputs (e.g. "{}" on the RAG path) the encoding can be longer
+        tokens_saved = max(0, raw_tokens - estimate_tokens(sql_result_text) - estimate_tokens(docs_text))
+        
         try:
             pred = self.synthesizer_module(
                 question=state["question"],
-                sql_result=str(state.get("sql_result", {})),
-                retrieved_docs=str(docs),
+                sql_result=sql_result_text,
+                retrieved_docs=docs_text,
                 format_hint=state["format_hint"]
             )
             
@@ -178,7 +187,8 @@ class RetailAgent:
             return {
                 "final_answer": pred.final_answer,
                 "explanation": pred.explanation,
-                "citations": citations
+                "citations": citations,
+                "prompt_tokens_saved": tokens_saved
             }
         except Exception as e:
             # Fallback: try to extract answer from SQL result directly
@@ -208,5 +218,6 @@ class RetailAgent:
             return {
                 "final_answer": final_answer,
                 "explanation": f"Answer extracted from SQL result. Original error: {str(e)[:100]}",
-                "citations": table_citations + doc_citations
+                "citations": table_citations + doc_citations,
+                "prompt_tokens_saved": tokens_saved
             }
@@ -0,0 +1,195 @@
+import math
+import numbers
+
+# Rough chars-per-token ratio; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+# Longer cell values (free text, BLOBs) are cut to this many characters
+MAX_CELL_CHARS = 60
+ELLIPSIS = "…"
+
+def estimate_tokens(text):
+    """Approximate the number of tokens in a string."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _truncate_text(text, max_tokens):
+    """Hard-cut text so that estimate_tokens(text) <= max_tokens."""
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    if max_chars == 0:
+        return ""
+    return text[:max_chars - len(ELLIPSIS)] + ELLIPSIS
+
+def _is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+def _format_number(value, decimals):
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return ""
+    if math.isinf(value):
+        return str(value)
+    # Fixed decimals for magnitudes >= 1, significant digits below that so
+    # small rates and ratios don't collapse to 0
+    if abs(value) >= 1:
+        text = f"{value:.{decimals}f}"
+        if "." in text:
+            text = text.rstrip("0").rstrip(".")
+    else:
+        text = f"{value:.3g}"
+    if float(text).is_integer():
+        return str(int(float(text)))
+    return text
+
+def _format_value(value, decimals, max_chars=MAX_CELL_CHARS):
+    if value is None:
+        return ""
+    if _is_number(value):
+        return _format_number(value, decimals)
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    text = str(value).replace("\n", " ")
+    if len(text) > max_chars:
+        text = text[:max_chars] + ELLIPSIS
+    return text
+
+def _is_id_like(col):
+    return str(col).lower().endswith("id")
+
+def _summary_line(rows, col, decimals):
+    """min/max/sum for a numeric column, or None if it has no numeric values."""
+    values = []
+    for r in rows:
+        v = r.get(col)
+        # Fast path for plain ints/floats; the ABC check is only for numpy and friends
+        if type(v) is not float and type(v) is not int and not _is_number(v):
+            continue
+        v = float(v)
+        if v == v:  # skip NaN
+            values.append(v)
+    if not values:
+        return None
+    return (
+        f"{col}: min={_format_number(min(values), decimals)}, "
+        f"max={_format_number(max(values), decimals)}, "
+        f"sum={_format_number(sum(values), decimals)}"
+    )
+
+def _omitted_marker(omitted):
+    noun = "row" if omitted == 1 else "rows"
+    return f"... ({omitted} {noun} omitted) ..."
+
+def _fits_in_full(rows, columns, decimals, max_chars):
+    """Render the full table, or return None as soon as it passes max_chars."""
+    lines = [" | ".join(columns)]
+    used = len(lines[0])
+    for r in rows:
+        line = " | ".join(_format_value(r.get(col), decimals) for col in columns)
+        used += 1 + len(line)
+        if used > max_chars:
+            return None
+        lines.append(line)
+    return "\n".join(lines)
+
+def encode_sql_result(sql_result, max_tokens=400, decimals=2):
+    """Render a SQLiteTool result as a compact header + rows table.
+
+    If the full table exceeds max_tokens, only the head and tail rows are kept,
+    followed by summary stats computed over all rows. If that still doesn't fit,
+    columns are dropped (ID-like first, then text, then numeric from the left, so
+    a trailing aggregate survives longest), and as a last resort the text is cut
+    off. The returned text never exceeds max_tokens.
+    """
+    if not sql_result:
+        return _truncate_text("No SQL result.", max_tokens)
+    if sql_result.get("error"):
+        return _truncate_text(f"Error: {sql_result['error']}", max_tokens)
+
+    columns = sql_result.get("columns") or []
+    rows = sql_result.get("rows") or []
+    if not rows:
+        return _truncate_text("No rows returned.", max_tokens)
+    if not columns:
+        columns = list(rows[0].keys())
+
+    full = _fits_in_full(rows, columns, decimals, max_tokens * CHARS_PER_TOKEN)
+    if full is not None:
+        return full
+
+    # Only the head and tail rows can ever be shown, so only those get formatted
+    max_keep = min(5, math.ceil(len(rows) / 2))
+    sampled = sorted(set(range(max_keep)) | set(range(len(rows) - max_keep, len(rows))))
+    cells = {i: {col: _format_value(rows[i].get(col), decimals) for col in columns} for i in sampled}
+
+    summaries = {col: None if _is_id_like(col) else _summary_line(rows, col, decimals) for col in columns}
+    drop_order = (
+        [c for c in reversed(columns) if _is_id_like(c)]
+        + [c for c in reversed(columns) if not _is_id_like(c) and not summaries[c]]
+        + [c for c in columns if summaries[c]]
+    )
+
+    text = ""
+    for n_dropped in range(len(columns)):
+        dropped = set(drop_order[:n_dropped])
+        shown = [c for c in columns if c not in dropped]
+        header = " | ".join(shown)
+        if dropped:
+            header += f" | (+{len(dropped)} more columns)"
+        summary = [f"rows: {len(rows)}"] + [summaries[c] for c in shown if summaries[c]]
+        # Shrink head/tail until the sample plus summary fits, always keeping a row
+        for keep in range(max_keep, 0, -1):
+            if 2 * keep >= len(rows):
+                indices, omitted = range(len(rows)), 0
+            else:
+                indices, omitted = list(range(keep)) + list(range(len(rows) - keep, len(rows))), len(rows) - 2 * keep
+            lines = [" | ".join(cells[i][c] for c in shown) for i in indices]
+            if omitted:
+                lines.insert(keep, _omitted_marker(omitted))
+            text = "\n".join([header] + lines)
+            if omitted:
+                text += "\n" + "\n".join(["summary:"] + summary)
+            if estimate_tokens(text) <= max_tokens:
+                return text
+    return _truncate_text(text, max_tokens)
+
+def estimate_raw_tokens(sql_result, sample_rows=20):
+    """Estimate tokens of str(sql_result) without building the full repr.
+
+    Small results are measured exactly; larger ones are extrapolated from the
+    repr length of about sample_rows rows spread evenly across the result.
+    """
+    rows = (sql_result or {}).get("rows") or []
+    if len(rows) <= sample_rows:
+        return estimate_tokens(str(sql_result or {}))
+    sample = rows[::len(rows) // sample_rows]
+    per_row = (len(str(sample)) - 2) / len(sample)
+    rest = len(str(dict(sql_result, rows=[])))
+    return math.ceil((rest + per_row * len(rows)) / CHARS_PER_TOKEN)
+
+def encode_docs(docs, max_tokens=600):
+    """Render retrieved chunks as '[id] content' lines, dropping scores and sources.
+
+    Chunks arrive sorted by relevance, so the lowest-ranked ones are dropped
+    first when the budget is exceeded; the chunk that crosses the budget is
+    cut down to whatever room is left.
+    """
+    if not docs:
+        return _truncate_text("No documents retrieved.", max_tokens)
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    parts = []
+    used = 0
+    for d in docs:
+        prefix = f"[{d['id']}] "
+        part = prefix + d['content']
+        sep = 2 if parts else 0
+        remaining = max_chars - used - sep
+        if len(part) > remaining:
+            # Only keep a partial chunk if some of its content still fits
+            if remaining > len(prefix) + len(ELLIPSIS):
+                parts.append(part[:remaining - len(ELLIPSIS)] + ELLIPSIS)
+            break
+        parts.append(part)
+        used += sep + len(part)
+    return _truncate_text("\n\n".join(parts), max_tokens)